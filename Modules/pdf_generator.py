@@ -5,18 +5,122 @@ Uses Playwright for reliable PDF generation from HTML
 """
 
 import os
+import re
 import sys
+import json
+import base64
+import shutil
 import asyncio
+import tempfile
 import argparse
+import hashlib
+import functools
+import itertools
+import subprocess
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 import platform
 
+# uvloop swaps asyncio's selector event loop for libuv, which is
+# noticeably faster at dispatching the CDP socket traffic all of this
+# module's throughput rides on. Linux/macOS only; a plain pip install
+# uvloop enables it, otherwise stock asyncio is used.
+try:
+    import uvloop  # type: ignore
+    uvloop.install()
+except ImportError:
+    pass
+
 try:
     from playwright.async_api import async_playwright  # type: ignore
     PLAYWRIGHT_AVAILABLE = True
 except ImportError:
     PLAYWRIGHT_AVAILABLE = False
 
+try:
+    import websockets  # type: ignore
+    WEBSOCKETS_AVAILABLE = True
+except ImportError:
+    WEBSOCKETS_AVAILABLE = False
+
+try:
+    import pikepdf  # type: ignore
+    PIKEPDF_AVAILABLE = True
+except ImportError:
+    PIKEPDF_AVAILABLE = False
+
+try:
+    import aiofiles  # type: ignore
+    AIOFILES_AVAILABLE = True
+except ImportError:
+    AIOFILES_AVAILABLE = False
+
+try:
+    from tqdm import tqdm  # type: ignore
+    TQDM_AVAILABLE = True
+except ImportError:
+    TQDM_AVAILABLE = False
+
+try:
+    import xxhash  # type: ignore
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+# Chromium startup flags trimmed for headless file:// rendering: no GPU
+# probing, extensions, background networking, or first-run work, none of
+# which matter for printing local call flow maps
+_LAUNCH_ARGS = [
+    '--no-sandbox',
+    '--disable-gpu',
+    '--disable-dev-shm-usage',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-sync',
+    '--no-first-run',
+    '--no-default-browser-check',
+    '--disable-features=TranslateUI,BackForwardCache',
+    '--mute-audio',
+]
+
+# Shared Playwright/browser instances so repeated conversions in the same
+# event loop reuse one Chromium process instead of relaunching it per file
+_playwright = None
+_browser = None
+
+async def _get_browser():
+    """Get the shared Chromium browser, launching it on first use"""
+    global _playwright, _browser
+    if _browser is None:
+        _playwright = await async_playwright().start()  # type: ignore
+        _browser = await _playwright.chromium.launch(args=_LAUNCH_ARGS, chromium_sandbox=False)
+    return _browser
+
+async def _route_abort_remote(route):
+    """Abort http(s) requests so stray CDN references can't stall a page"""
+    if route.request.url.startswith(('http:', 'https:')):
+        await route.abort()
+    else:
+        await route.continue_()
+
+async def _new_context(browser, block_remote=True):
+    """Create a browser context, optionally short-circuiting remote fetches"""
+    context = await browser.new_context()
+    if block_remote:
+        await context.route('**/*', _route_abort_remote)
+    return context
+
+async def shutdown():
+    """Close the shared browser, stop Playwright, and drop staging files"""
+    global _playwright, _browser
+    if _browser is not None:
+        await _browser.close()
+        _browser = None
+    if _playwright is not None:
+        await _playwright.stop()
+        _playwright = None
+    _cleanup_staging_dir()
+
 def check_playwright():
     """Check if Playwright is available and install instructions if not"""
     if PLAYWRIGHT_AVAILABLE:
@@ -31,53 +135,108 @@ def check_playwright():
     
     return False
 
-async def convert_html_to_pdf_async(html_file, output_dir=None):
-    """Convert HTML file to PDF using Playwright"""
+def _to_thread(func, *args, **kwargs):
+    """Run func(*args, **kwargs) in the default executor, like asyncio.to_thread
+
+    asyncio.to_thread only exists from Python 3.9; this repo still
+    supports 3.7 (see setup_pdf.check_python_version), so blocking file
+    I/O is routed through run_in_executor instead.
+    """
+    loop = asyncio.get_running_loop()
+    return loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+def _iter_html(root, recursive=False):
+    """Yield HTML files under root as Paths, using os.scandir
+
+    scandir reuses the stat info from the directory read instead of
+    re-statting every entry the way Path.glob does. With recursive set,
+    nested layouts like CallFlowMaps_*/Individual/ are walked too.
+    """
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.lower().endswith('.html'):
+                yield Path(entry.path)
+            elif recursive and entry.is_dir(follow_symlinks=False):
+                # Like os.walk / Path.glob, don't follow directory
+                # symlinks: one pointing at an ancestor would otherwise
+                # recurse until the scan crashes
+                yield from _iter_html(entry.path, recursive)
+
+def _hash_file(path):
+    """Content digest for duplicate detection (xxh3 when available)
+
+    Hashing is memory-bandwidth bound and far cheaper than a Chromium
+    render, so identical inputs only pay for the render once. Falls back
+    to the stdlib blake2b when xxhash isn't installed. Returns None if
+    the file can't be read.
+    """
+    digest = xxhash.xxh3_64() if XXHASH_AVAILABLE else hashlib.blake2b(digest_size=16)  # type: ignore
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+def _pdf_dest(html_file, root, out_dir):
+    """Map an HTML file under root to its PDF path under out_dir
+
+    Mirrors the source subtree below root, so a recursive scan that finds
+    same-named files in different subdirectories (e.g. two Dashboard.html)
+    gets distinct output paths instead of silently overwriting one PDF.
+    """
+    rel_dir = Path(html_file).parent.relative_to(root)
+    return Path(out_dir) / rel_dir / f"{Path(html_file).stem}.pdf"
+
+def _pdf_up_to_date(html_file, pdf_output_path):
+    """Check if the PDF already exists and is at least as new as its HTML source"""
+    try:
+        return (pdf_output_path.exists() and
+                pdf_output_path.stat().st_mtime >= Path(html_file).stat().st_mtime)
+    except OSError:
+        return False
+
+async def convert_html_to_pdf_async(html_file, output_dir=None, render_delay_ms=0, force=False, block_remote=True, compress=True):
+    """Convert HTML file to PDF using Playwright
+
+    Waits only for 'domcontentloaded' since call flow maps are static
+    local HTML; 'networkidle' would add 500ms+ of forced idle time per
+    page. Pages that render content after load can pass render_delay_ms
+    to reinstate a fixed wait. Conversion is skipped when the PDF is
+    already newer than the HTML unless force is set.
+    """
     if not os.path.exists(html_file):
         print(f"✗ HTML file not found: {html_file}")
         return None
-    
+
     # Determine output path
     html_path = Path(html_file)
     if output_dir:
         pdf_path = Path(output_dir) / f"{html_path.stem}.pdf"
     else:
         pdf_path = html_path.with_suffix('.pdf')
-    
+
+    # Skip the render entirely if the output is already up to date
+    if not force and _pdf_up_to_date(html_path, pdf_path):
+        print(f"✓ PDF up to date, skipping: {pdf_path.name}")
+        return str(pdf_path)
+
     # Create output directory if needed
     pdf_path.parent.mkdir(parents=True, exist_ok=True)
     
     try:
-        async with async_playwright() as p:  # type: ignore
-            # Launch browser
-            browser = await p.chromium.launch()
-            page = await browser.new_page()
-            
-            # Convert file path to file:// URL
-            file_url = html_path.resolve().as_uri()
-            
-            # Load the HTML file
-            await page.goto(file_url, wait_until='networkidle')
-            
-            # Wait a bit for any dynamic content
-            await page.wait_for_timeout(2000)
-            
-            # Generate PDF with good settings
-            await page.pdf(
-                path=str(pdf_path),
-                format='Letter',
-                margin={
-                    'top': '0.75in',
-                    'right': '0.75in', 
-                    'bottom': '0.75in',
-                    'left': '0.75in'
-                },
-                print_background=True,
-                prefer_css_page_size=True
-            )
-            
-            await browser.close()
-            
+        browser = await _get_browser()
+        context = await _new_context(browser, block_remote)
+        try:
+            page = await _load_page(context, html_path, render_delay_ms)
+            try:
+                await _render_page(page, pdf_path, compress)
+            finally:
+                await page.close()
+        finally:
+            await context.close()
+
         if pdf_path.exists():
             print(f"✓ Generated PDF: {pdf_path.name}")
             return str(pdf_path)
@@ -89,91 +248,692 @@ async def convert_html_to_pdf_async(html_file, output_dir=None):
         print(f"✗ PDF generation error: {e}")
         return None
 
-def convert_html_to_pdf(html_file, output_dir=None):
+async def _run_and_shutdown(coro):
+    """Run a conversion coroutine and tear down the shared browser after it"""
+    try:
+        return await coro
+    finally:
+        await shutdown()
+
+def convert_html_to_pdf(html_file, output_dir=None, render_delay_ms=0, force=False, block_remote=True, compress=True):
     """Synchronous wrapper for async PDF conversion"""
-    return asyncio.run(convert_html_to_pdf_async(html_file, output_dir))
+    return asyncio.run(_run_and_shutdown(convert_html_to_pdf_async(html_file, output_dir, render_delay_ms, force, block_remote, compress)))
+
+# How many pages a browser context serves before it is recycled. Reusing
+# a context amortizes its setup cost, but long-lived contexts accumulate
+# retained protocol objects in Playwright, so they are closed and
+# re-created periodically to bound memory.
+_CONTEXT_RECYCLE_PAGES = 25
+
+# Above this size, push the file through goto instead of set_content so
+# Chromium streams it from disk rather than receiving it over the protocol
+_SET_CONTENT_MAX_BYTES = 2 * 1024 * 1024
+
+# Anchored on the tag-name boundary so <basefont> / <header> (or the same
+# strings in text content) don't count as <base> / <head>
+_BASE_TAG_RE = re.compile(r'<base[\s/>]', re.IGNORECASE)
+_HEAD_TAG_RE = re.compile(r'<head[\s>]', re.IGNORECASE)
+
+async def _read_html_for_set_content(html_path):
+    """Read html_path, injecting a <base> tag so relative resources resolve
+
+    Returns None when the document has no <head> to inject into;
+    prepending the tag instead would land it before any doctype and flip
+    Chromium into quirks mode, so the caller should goto the file instead.
+    """
+    html_text = await _to_thread(html_path.read_text, encoding='utf-8')
+    if _BASE_TAG_RE.search(html_text):
+        return html_text
+    head_match = _HEAD_TAG_RE.search(html_text)
+    head_end = html_text.find('>', head_match.start()) if head_match else -1
+    if head_end == -1:
+        return None
+    base_tag = f'<base href="{html_path.parent.resolve().as_uri()}/">'
+    return html_text[:head_end + 1] + base_tag + html_text[head_end + 1:]
+
+async def _load_page(context, html_file, render_delay_ms=0):
+    """Open a page for html_file in context and wait for it to load
+
+    Small files are injected via set_content, which skips the full CDP
+    navigation round-trips of goto; large or non-UTF-8 files fall back
+    to a regular file:// navigation.
+    """
+    html_path = Path(html_file)
+    page = await context.new_page()
+    try:
+        loaded = False
+        try:
+            if html_path.stat().st_size <= _SET_CONTENT_MAX_BYTES:
+                html_text = await _read_html_for_set_content(html_path)
+                if html_text is not None:
+                    await page.set_content(html_text, wait_until='domcontentloaded')
+                    loaded = True
+        except (OSError, UnicodeDecodeError):
+            pass
+
+        if not loaded:
+            await page.goto(html_path.resolve().as_uri(), wait_until='domcontentloaded')
+        await page.wait_for_load_state('load')
+
+        # Optional fixed wait for pages with delayed dynamic content
+        if render_delay_ms:
+            await page.wait_for_timeout(render_delay_ms)
+
+        return page
+    except Exception:
+        await page.close()
+        raise
+
+def _compress_pdf(pdf_output_path):
+    """Recompress a PDF's streams in place with pikepdf, if installed
+
+    Chromium emits generously sized streams and full font subsets;
+    rewriting them typically shrinks call flow PDFs several-fold, which
+    pays off for every download or viewer load downstream.
+    """
+    if not PIKEPDF_AVAILABLE:
+        return
+    pdf_output_path = Path(pdf_output_path)
+    tmp_path = pdf_output_path.with_suffix('.pdf.tmp')
+    try:
+        with pikepdf.open(pdf_output_path) as pdf:  # type: ignore
+            pdf.save(tmp_path, compress_streams=True,
+                     object_stream_mode=pikepdf.ObjectStreamMode.generate)  # type: ignore
+        os.replace(tmp_path, pdf_output_path)
+    except Exception as e:
+        print(f"⚠ Could not compress {pdf_output_path.name}: {e}")
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+
+async def _write_bytes(path, data):
+    """Write bytes to path without blocking the event loop"""
+    if AIOFILES_AVAILABLE:
+        async with aiofiles.open(path, 'wb') as f:  # type: ignore
+            await f.write(data)
+    else:
+        await _to_thread(Path(path).write_bytes, data)
 
-async def batch_convert_directory_async(html_dir, pdf_dir=None):
-    """Convert all HTML files in a directory to PDF"""
+# PDFs are first written to a RAM-backed staging directory and then moved
+# into place, so the write and compression passes never pay fsync/barrier
+# latency on slow or network-mounted output directories, and readers only
+# ever see complete files
+_staging_dir = None
+_stage_counter = itertools.count()
+
+def _get_staging_dir():
+    """Get the staging directory, preferring the /dev/shm tmpfs on Linux"""
+    global _staging_dir
+    if _staging_dir is None:
+        shm = '/dev/shm'
+        if sys.platform.startswith('linux') and os.path.isdir(shm) and os.access(shm, os.W_OK):
+            _staging_dir = Path(tempfile.mkdtemp(prefix='teams_pdf_', dir=shm))
+        else:
+            _staging_dir = Path(tempfile.mkdtemp(prefix='teams_pdf_'))
+    return _staging_dir
+
+def _stage_path(pdf_output_path):
+    """Allocate a unique staging path for pdf_output_path"""
+    return _get_staging_dir() / f"{next(_stage_counter)}-{Path(pdf_output_path).name}"
+
+def _move_into_place(tmp_path, pdf_output_path):
+    """Move a staged PDF to its final location, atomically when possible"""
+    try:
+        os.replace(tmp_path, pdf_output_path)
+    except OSError:
+        # Staging and output are on different filesystems
+        shutil.move(str(tmp_path), str(pdf_output_path))
+
+def _cleanup_staging_dir():
+    global _staging_dir
+    if _staging_dir is not None:
+        shutil.rmtree(_staging_dir, ignore_errors=True)
+        _staging_dir = None
+
+async def _render_page(page, pdf_output_path, compress=True):
+    """Print an already-loaded page to PDF
+
+    page.pdf() is called without a path so the bytes come straight back
+    over the protocol; writing them ourselves keeps Playwright's
+    synchronous decode-and-write out of the event loop and lets the
+    disk write overlap the next file's navigation.
+    """
+    data = await page.pdf(
+        format='Letter',
+        margin={
+            'top': '0.75in',
+            'right': '0.75in',
+            'bottom': '0.75in',
+            'left': '0.75in'
+        },
+        print_background=True,
+        prefer_css_page_size=True
+    )
+    tmp_path = _stage_path(pdf_output_path)
+    await _write_bytes(tmp_path, data)
+    if compress:
+        await _to_thread(_compress_pdf, tmp_path)
+    await _to_thread(_move_into_place, tmp_path, pdf_output_path)
+
+async def batch_convert_directory_async(html_dir, pdf_dir=None, max_concurrency=None, render_delay_ms=0, force=False, block_remote=True, recursive=False, compress=True, dedupe=False):
+    """Convert all HTML files in a directory to PDF concurrently
+
+    Conversion is pipelined: loader tasks navigate pages (I/O-bound on
+    the CDP socket) while renderer tasks print already-loaded pages to
+    PDF (CPU-bound in Chromium), so navigation of later files overlaps
+    PDF emission of earlier ones. Each stage runs max_concurrency tasks
+    (default: min(8, CPU count)). Use render_delay_ms for pages that
+    draw content after the load event. Files whose PDF is already newer
+    than the HTML are skipped unless force is set.
+    """
     html_path = Path(html_dir)
     if not html_path.exists():
         print(f"✗ HTML directory not found: {html_dir}")
         return []
-    
+
+    # Start the Chromium launch immediately so its few hundred ms of
+    # startup overlap the directory scan below
+    browser_task = asyncio.ensure_future(_get_browser())
+
     # Set up PDF output directory
     if pdf_dir is None:
         pdf_dir = html_path.parent / "PDF"
-    
+
     pdf_path = Path(pdf_dir)
     pdf_path.mkdir(parents=True, exist_ok=True)
-    
+
     # Find all HTML files
-    html_files = list(html_path.glob("*.html"))
+    html_files = list(_iter_html(html_path, recursive))
     if not html_files:
         print(f"✗ No HTML files found in: {html_dir}")
+        await browser_task
         return []
-    
+
     print(f"Converting {len(html_files)} HTML files to PDF...")
-    
+
+    if max_concurrency is None:
+        max_concurrency = min(8, os.cpu_count() or 4)
+    else:
+        # A non-positive value would spawn zero loader/renderer tasks and
+        # silently return an empty result; treat it as "one at a time"
+        max_concurrency = max(1, max_concurrency)
+
+    # Launch (or reuse) the shared browser once for all conversions
+    browser = await browser_task
+
+    # Producer/consumer pipeline: loaders navigate pages and hand them to
+    # renderers, which print them to PDF and close the context. Bounding
+    # render_q caps how many loaded pages can pile up in memory.
+    nav_q = asyncio.Queue()
+    render_q = asyncio.Queue(maxsize=max_concurrency)
     generated_pdfs = []
-    
-    async with async_playwright() as p:  # type: ignore
-        # Launch browser once for all conversions
-        browser = await p.chromium.launch()
-        
-        for html_file in html_files:
+
+    skipped = 0
+    queued = []
+    for html_file in html_files:
+        pdf_output_path = _pdf_dest(html_file, html_path, pdf_path)
+        if not force and _pdf_up_to_date(html_file, pdf_output_path):
+            # Count the existing PDF as a result, matching the single-file
+            # path; otherwise an all-up-to-date rerun returns [] and
+            # callers report it as a failure
+            generated_pdfs.append(str(pdf_output_path))
+            skipped += 1
+            continue
+        pdf_output_path.parent.mkdir(parents=True, exist_ok=True)
+        queued.append((html_file, pdf_output_path))
+
+    if skipped:
+        print(f"✓ Skipped {skipped} up-to-date PDFs (use --force to regenerate)")
+
+    # With dedupe on, identical HTML content is rendered once and the
+    # remaining outputs are hard-linked (or copied) from that PDF
+    duplicate_links = []
+    if dedupe and queued:
+        digests = await asyncio.gather(
+            *[_to_thread(_hash_file, html_file) for html_file, _ in queued])
+        first_output = {}
+        unique = []
+        for (html_file, pdf_output_path), digest in zip(queued, digests):
+            if digest is not None and digest in first_output:
+                duplicate_links.append((first_output[digest], pdf_output_path))
+            else:
+                if digest is not None:
+                    first_output[digest] = pdf_output_path
+                unique.append((html_file, pdf_output_path))
+        if duplicate_links:
+            print(f"✓ {len(duplicate_links)} duplicate HTML files will reuse rendered PDFs")
+        queued = unique
+
+    for item in queued:
+        nav_q.put_nowait(item)
+
+    # With many concurrent tasks, a per-file print from each coroutine
+    # serializes on the stdout lock and floods the terminal; batch the
+    # progress into one tqdm bar when it's installed
+    pbar = tqdm(total=nav_q.qsize(), desc='PDF', unit='file') if TQDM_AVAILABLE else None
+
+    def _report(message):
+        if pbar is not None:
+            pbar.write(message)
+        else:
+            print(message)
+
+    def _advance():
+        if pbar is not None:
+            pbar.update(1)
+
+    # Context bookkeeping shared between the stages: pages from one
+    # context may still be waiting in render_q when its loader retires
+    # it, so the context is only closed once its last page is rendered.
+    async def _retire_context(ctx_state):
+        ctx_state['retired'] = True
+        if ctx_state['open_pages'] == 0:
+            await ctx_state['context'].close()
+
+    async def _loader():
+        ctx_state = None
+        pages_served = 0
+        try:
+            while True:
+                try:
+                    html_file, pdf_output_path = nav_q.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                if ctx_state is None:
+                    ctx_state = {'context': await _new_context(browser, block_remote),
+                                 'open_pages': 0, 'retired': False}
+                    pages_served = 0
+                try:
+                    page = await _load_page(ctx_state['context'], html_file, render_delay_ms)
+                except Exception as e:
+                    _report(f"✗ Error loading {html_file.name}: {e}")
+                    _advance()
+                    continue
+                ctx_state['open_pages'] += 1
+                pages_served += 1
+                await render_q.put((ctx_state, page, html_file, pdf_output_path))
+                if pages_served >= _CONTEXT_RECYCLE_PAGES:
+                    await _retire_context(ctx_state)
+                    ctx_state = None
+        finally:
+            if ctx_state is not None:
+                await _retire_context(ctx_state)
+
+    async def _renderer():
+        while True:
+            item = await render_q.get()
+            if item is None:
+                return
+            ctx_state, page, html_file, pdf_output_path = item
             try:
-                page = await browser.new_page()
-                
-                # Determine output path
-                pdf_output_path = pdf_path / f"{html_file.stem}.pdf"
-                
-                # Convert file path to file:// URL
-                file_url = html_file.resolve().as_uri()
-                
-                # Load the HTML file
-                await page.goto(file_url, wait_until='networkidle')
-                
-                # Wait a bit for any dynamic content
-                await page.wait_for_timeout(1000)
-                
-                # Generate PDF
-                await page.pdf(
-                    path=str(pdf_output_path),
-                    format='Letter',
-                    margin={
-                        'top': '0.75in',
-                        'right': '0.75in', 
-                        'bottom': '0.75in',
-                        'left': '0.75in'
-                    },
-                    print_background=True,
-                    prefer_css_page_size=True
-                )
-                
+                await _render_page(page, pdf_output_path, compress)
+            except Exception as e:
+                _report(f"✗ Error converting {html_file.name}: {e}")
+                _advance()
+                continue
+            finally:
                 await page.close()
-                
-                if pdf_output_path.exists():
+                ctx_state['open_pages'] -= 1
+                if ctx_state['retired'] and ctx_state['open_pages'] == 0:
+                    await ctx_state['context'].close()
+            if pdf_output_path.exists():
+                if pbar is None:
                     print(f"✓ Generated PDF: {pdf_output_path.name}")
-                    generated_pdfs.append(str(pdf_output_path))
-                else:
-                    print(f"✗ Failed to generate PDF for: {html_file.name}")
-                    
-            except Exception as e:
-                print(f"✗ Error converting {html_file.name}: {e}")
-        
-        await browser.close()
-    
+                generated_pdfs.append(str(pdf_output_path))
+            else:
+                _report(f"✗ Failed to generate PDF for: {html_file.name}")
+            _advance()
+
+    loaders = [asyncio.create_task(_loader()) for _ in range(max_concurrency)]
+    renderers = [asyncio.create_task(_renderer()) for _ in range(max_concurrency)]
+
+    await asyncio.gather(*loaders)
+    for _ in renderers:
+        await render_q.put(None)
+    await asyncio.gather(*renderers)
+
+    if pbar is not None:
+        pbar.close()
+
+    # Materialize the deduplicated outputs from their rendered source
+    for source_pdf, dup_pdf in duplicate_links:
+        source_pdf = Path(source_pdf)
+        if not source_pdf.exists():
+            print(f"✗ Failed to generate PDF for: {dup_pdf.name} (source render failed)")
+            continue
+        try:
+            if dup_pdf.exists():
+                dup_pdf.unlink()
+            os.link(source_pdf, dup_pdf)
+        except OSError:
+            shutil.copy(source_pdf, dup_pdf)
+        print(f"✓ Generated PDF (deduplicated): {dup_pdf.name}")
+        generated_pdfs.append(str(dup_pdf))
+
     return generated_pdfs
 
-def batch_convert_directory(html_dir, pdf_dir=None):
+def batch_convert_directory(html_dir, pdf_dir=None, max_concurrency=None, render_delay_ms=0, force=False, block_remote=True, recursive=False, compress=True, dedupe=False):
     """Synchronous wrapper for async batch conversion"""
-    return asyncio.run(batch_convert_directory_async(html_dir, pdf_dir))
+    return asyncio.run(_run_and_shutdown(batch_convert_directory_async(html_dir, pdf_dir, max_concurrency, render_delay_ms, force, block_remote, recursive, compress, dedupe)))
+
+# --- Raw CDP backend -------------------------------------------------------
+# Playwright marshals every call through a Node.js subprocess. For the plain
+# "load local HTML, print PDF" workload that bridge is avoidable: launch
+# headless Chromium directly and drive Page.navigate / Page.printToPDF over
+# one DevTools websocket. Available via --backend cdp when the `websockets`
+# package and a Chromium/Chrome binary are present.
+
+def _playwright_chromium():
+    """Locate the Chromium binary inside Playwright's browsers directory
+
+    The documented install path (setup_pdf.py running `playwright install
+    chromium`) puts the browser under ms-playwright, never on PATH, so
+    the CDP backend probes the same chromium-* layout the probe cache
+    fingerprints. Newest revision wins when several are installed.
+    """
+    try:
+        from setup_pdf import _browsers_path
+    except ImportError:
+        return None
+    browsers_path = _browsers_path()
+    if browsers_path is None:
+        return None
+    try:
+        revisions = sorted((entry.path for entry in os.scandir(browsers_path)
+                            if entry.is_dir(follow_symlinks=False) and
+                            entry.name.startswith('chromium-')),
+                           reverse=True)
+    except OSError:
+        return None
+    for revision in revisions:
+        for rel in ('chrome-linux/chrome',
+                    'chrome-mac/Chromium.app/Contents/MacOS/Chromium',
+                    'chrome-win/chrome.exe'):
+            exe = Path(revision) / rel
+            if exe.is_file():
+                return str(exe)
+    return None
+
+def _find_chromium():
+    """Locate a Chromium/Chrome executable on PATH or in the Playwright install"""
+    for name in ('chromium', 'chromium-browser', 'google-chrome',
+                 'google-chrome-stable', 'chrome'):
+        path = shutil.which(name)
+        if path:
+            return path
+    return _playwright_chromium()
+
+async def _launch_chromium_cdp(executable):
+    """Launch headless Chromium for CDP use
+
+    Returns (process, DevTools websocket URL, profile directory). The
+    caller owns the throwaway profile directory and must remove it once
+    the process has exited.
+    """
+    user_data_dir = tempfile.mkdtemp(prefix='teams_pdf_cdp_')
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            executable, '--headless=new', '--remote-debugging-port=0',
+            f'--user-data-dir={user_data_dir}', *_LAUNCH_ARGS,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE)
+    except Exception:
+        shutil.rmtree(user_data_dir, ignore_errors=True)
+        raise
+
+    # Chromium prints the endpoint on stderr once the debugger is up
+    ws_url = None
+    try:
+        while True:
+            line = await asyncio.wait_for(proc.stderr.readline(), timeout=30)
+            if not line:
+                break
+            text = line.decode(errors='replace')
+            if 'DevTools listening on ' in text:
+                ws_url = text.split('DevTools listening on ', 1)[1].strip()
+                break
+    finally:
+        if not ws_url:
+            proc.terminate()
+            await proc.wait()
+            shutil.rmtree(user_data_dir, ignore_errors=True)
+
+    if not ws_url:
+        raise RuntimeError("Chromium did not report a DevTools endpoint")
+    return proc, ws_url, user_data_dir
+
+class _CDPSession:
+    """Minimal Chrome DevTools Protocol client over a single websocket"""
+
+    def __init__(self, ws):
+        self._ws = ws
+        self._next_id = 0
+        self._pending = {}
+        self._event_waiters = []
+        self._reader = None
+
+    def start(self):
+        self._reader = asyncio.create_task(self._read_loop())
+
+    async def stop(self):
+        if self._reader:
+            self._reader.cancel()
+
+    async def _read_loop(self):
+        async for raw in self._ws:
+            msg = json.loads(raw)
+            if 'id' in msg:
+                future = self._pending.pop(msg['id'], None)
+                if future and not future.done():
+                    if 'error' in msg:
+                        future.set_exception(
+                            RuntimeError(msg['error'].get('message', 'CDP error')))
+                    else:
+                        future.set_result(msg.get('result', {}))
+            else:
+                for waiter in list(self._event_waiters):
+                    method, session_id, future = waiter
+                    if future.done():
+                        # A wait_for timeout cancels the future but leaves
+                        # the waiter registered; drop it instead of
+                        # accumulating one dead entry per timed-out event
+                        self._event_waiters.remove(waiter)
+                    elif (msg.get('method') == method and
+                            msg.get('sessionId') == session_id):
+                        future.set_result(msg.get('params', {}))
+                        self._event_waiters.remove(waiter)
+
+    async def send(self, method, params=None, session_id=None):
+        """Send a CDP command and wait for its response"""
+        self._next_id += 1
+        msg = {'id': self._next_id, 'method': method, 'params': params or {}}
+        if session_id:
+            msg['sessionId'] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[self._next_id] = future
+        await self._ws.send(json.dumps(msg))
+        return await future
+
+    def event(self, method, session_id=None):
+        """Return a future resolved when the named event next fires"""
+        future = asyncio.get_running_loop().create_future()
+        self._event_waiters.append((method, session_id, future))
+        return future
+
+def _collect_jobs(input_path, output_dir=None, force=False, recursive=False):
+    """Build (html, pdf) path pairs for a file or directory input"""
+    input_path = Path(input_path)
+    if input_path.is_file():
+        html_files = [input_path]
+        default_dir = None
+    else:
+        html_files = sorted(_iter_html(input_path, recursive))
+        default_dir = input_path.parent / "PDF"
+
+    jobs = []
+    for html_file in html_files:
+        if input_path.is_dir():
+            # Mirror the source subtree so recursive scans can't collide
+            base = Path(output_dir) if output_dir else default_dir
+            pdf_output_path = _pdf_dest(html_file, input_path, base)
+        elif output_dir:
+            pdf_output_path = Path(output_dir) / f"{html_file.stem}.pdf"
+        else:
+            pdf_output_path = html_file.with_suffix('.pdf')
+        if force or not _pdf_up_to_date(html_file, pdf_output_path):
+            jobs.append((html_file, pdf_output_path))
+    return jobs
+
+async def cdp_convert_files(jobs, render_delay_ms=0, compress=True):
+    """Convert (html, pdf) path pairs over a raw CDP connection
+
+    Launches headless Chromium once and reuses a single page target,
+    navigating it to each file and printing via Page.printToPDF.
+    """
+    executable = _find_chromium()
+    if executable is None:
+        print("✗ No Chromium/Chrome executable found on PATH for the CDP backend")
+        return []
+
+    proc, ws_url, user_data_dir = await _launch_chromium_cdp(executable)
+    generated_pdfs = []
+    try:
+        async with websockets.connect(ws_url, max_size=None) as ws:  # type: ignore
+            cdp = _CDPSession(ws)
+            cdp.start()
+            try:
+                target = await cdp.send('Target.createTarget', {'url': 'about:blank'})
+                attached = await cdp.send('Target.attachToTarget',
+                                          {'targetId': target['targetId'], 'flatten': True})
+                session_id = attached['sessionId']
+                await cdp.send('Page.enable', session_id=session_id)
+
+                for html_file, pdf_output_path in jobs:
+                    try:
+                        loaded = cdp.event('Page.loadEventFired', session_id)
+                        file_url = Path(html_file).resolve().as_uri()
+                        await cdp.send('Page.navigate', {'url': file_url}, session_id)
+                        await asyncio.wait_for(loaded, timeout=30)
+                        if render_delay_ms:
+                            await asyncio.sleep(render_delay_ms / 1000)
+
+                        result = await cdp.send('Page.printToPDF', {
+                            'paperWidth': 8.5,
+                            'paperHeight': 11,
+                            'marginTop': 0.75,
+                            'marginRight': 0.75,
+                            'marginBottom': 0.75,
+                            'marginLeft': 0.75,
+                            'printBackground': True,
+                            'preferCSSPageSize': True,
+                        }, session_id)
+
+                        pdf_output_path = Path(pdf_output_path)
+                        pdf_output_path.parent.mkdir(parents=True, exist_ok=True)
+                        tmp_path = _stage_path(pdf_output_path)
+                        await _write_bytes(tmp_path, base64.b64decode(result['data']))
+                        if compress:
+                            await _to_thread(_compress_pdf, tmp_path)
+                        await _to_thread(_move_into_place, tmp_path, pdf_output_path)
+                    except Exception as e:
+                        print(f"✗ Error converting {Path(html_file).name}: {e}")
+                        continue
+                    print(f"✓ Generated PDF: {pdf_output_path.name}")
+                    generated_pdfs.append(str(pdf_output_path))
+            finally:
+                await cdp.stop()
+    finally:
+        proc.terminate()
+        await proc.wait()
+        shutil.rmtree(user_data_dir, ignore_errors=True)
+        _cleanup_staging_dir()
+
+    return generated_pdfs
+
+# --- wkhtmltopdf backend ---------------------------------------------------
+# Fallback for machines where Playwright's Chromium isn't available but
+# wkhtmltopdf (see setup_pdf.py) is. Each invocation is a single-threaded
+# QtWebKit process, so a process pool turns N cores into N× throughput.
+
+def _wk_one(html_file, pdf_output_path):
+    """Convert one HTML file with wkhtmltopdf; returns the PDF path or None"""
+    cmd = [
+        'wkhtmltopdf',
+        '--page-size', 'Letter',
+        '--margin-top', '0.75in',
+        '--margin-right', '0.75in',
+        '--margin-bottom', '0.75in',
+        '--margin-left', '0.75in',
+        '--disable-javascript',
+        '--load-error-handling', 'ignore',
+        str(html_file),
+        str(pdf_output_path)
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except Exception:
+        return None
+    if result.returncode == 0 and Path(pdf_output_path).exists():
+        return str(pdf_output_path)
+    return None
+
+def wk_batch(html_files, out_dir, workers=None, root=None):
+    """Convert HTML files to PDF with wkhtmltopdf across a process pool
+
+    With root set, the source layout below it is mirrored under out_dir
+    so recursive scans with same-named files don't overwrite each other.
+    """
+    html_files = [Path(f) for f in html_files]
+    if not html_files:
+        return []
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if root is not None:
+        outputs = [_pdf_dest(html_file, root, out_dir) for html_file in html_files]
+    else:
+        outputs = [out_dir / f"{html_file.stem}.pdf" for html_file in html_files]
+    for output in outputs:
+        output.parent.mkdir(parents=True, exist_ok=True)
+
+    # ProcessPoolExecutor raises on max_workers <= 0; clamp like the
+    # Playwright batch path does
+    workers = max(1, workers) if workers is not None else os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_wk_one, html_files, outputs))
+
+    generated_pdfs = []
+    for html_file, result in zip(html_files, results):
+        if result:
+            print(f"✓ Generated PDF: {Path(result).name}")
+            generated_pdfs.append(result)
+        else:
+            print(f"✗ Failed to generate PDF for: {html_file.name}")
+    return generated_pdfs
 
 def main():
     parser = argparse.ArgumentParser(description="Convert Teams Call Flow HTML files to PDF")
     parser.add_argument("input", nargs='?', help="HTML file or directory to convert")
     parser.add_argument("-o", "--output", help="Output directory for PDFs")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Maximum concurrent conversions (default: min(8, CPU count))")
+    parser.add_argument("--render-delay-ms", type=int, default=0,
+                        help="Extra wait after page load for delayed dynamic content (default: 0)")
+    parser.add_argument("-f", "--force", action="store_true",
+                        help="Regenerate PDFs even if they are newer than their HTML source")
+    parser.add_argument("--allow-remote", action="store_true",
+                        help="Allow pages to fetch http(s) resources instead of blocking them")
+    parser.add_argument("--backend", choices=['playwright', 'cdp', 'wkhtmltopdf'], default='playwright',
+                        help="Rendering backend: Playwright (default), a direct CDP connection, "
+                             "or a wkhtmltopdf process pool")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="Also convert HTML files in subdirectories")
+    parser.add_argument("--no-compress", dest='compress', action='store_false',
+                        help="Skip the post-render PDF stream recompression")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="Render identical HTML files once and link the duplicate PDFs "
+                             "(duplicates then share one PDF's timestamps)")
     parser.add_argument("--check-deps", action="store_true", help="Check for required dependencies")
     
     args = parser.parse_args()
@@ -191,25 +951,79 @@ def main():
         parser.print_help()
         sys.exit(1)
     
-    if not check_playwright():
+    backend = args.backend
+    if backend == 'cdp' and not WEBSOCKETS_AVAILABLE:
+        print("⚠ websockets package not found; falling back to the Playwright backend")
+        print("  Install with: pip install websockets")
+        backend = 'playwright'
+    if backend == 'cdp' and not _find_chromium():
+        print("⚠ No Chromium/Chrome found on PATH or in the Playwright install; "
+              "falling back to the Playwright backend")
+        backend = 'playwright'
+    if backend == 'wkhtmltopdf' and not shutil.which('wkhtmltopdf'):
+        print("⚠ wkhtmltopdf not found on PATH; falling back to the Playwright backend")
+        backend = 'playwright'
+
+    if backend == 'playwright' and not check_playwright():
         print("✗ Playwright is required but not found")
         print("Install with: pip install playwright && playwright install chromium")
         sys.exit(1)
-    
+
     input_path = Path(args.input)
-    
+    valid_input = (input_path.is_dir() or
+                   (input_path.is_file() and input_path.suffix.lower() == '.html'))
+
+    if backend == 'cdp' and valid_input:
+        # Direct CDP conversion, no Playwright involved
+        jobs = _collect_jobs(input_path, args.output, args.force, args.recursive)
+        generated_pdfs = asyncio.run(cdp_convert_files(jobs, args.render_delay_ms, args.compress))
+
+        print(f"\n=== Conversion Complete ===")
+        print(f"Generated {len(generated_pdfs)} PDF files")
+        if jobs and not generated_pdfs:
+            sys.exit(1)
+        return
+
+    if backend == 'wkhtmltopdf' and valid_input:
+        # wkhtmltopdf across a process pool, no Chromium involved
+        if input_path.is_file():
+            html_files = [input_path]
+            out_dir = Path(args.output) if args.output else input_path.parent
+            root = None
+        else:
+            html_files = sorted(_iter_html(input_path, args.recursive))
+            out_dir = Path(args.output) if args.output else input_path.parent / "PDF"
+            root = input_path
+        if not args.force:
+            html_files = [f for f in html_files
+                          if not _pdf_up_to_date(f, _pdf_dest(f, root, out_dir)
+                                                 if root else out_dir / f"{f.stem}.pdf")]
+
+        generated_pdfs = wk_batch(html_files, out_dir, args.jobs, root)
+
+        print(f"\n=== Conversion Complete ===")
+        print(f"Generated {len(generated_pdfs)} PDF files")
+        if html_files and not generated_pdfs:
+            sys.exit(1)
+        return
+
     if input_path.is_file() and input_path.suffix.lower() == '.html':
-        # Convert single file
-        pdf_file = convert_html_to_pdf(str(input_path), args.output)
+        # Convert single file (one event loop for the whole run)
+        pdf_file = asyncio.run(_run_and_shutdown(
+            convert_html_to_pdf_async(str(input_path), args.output, args.render_delay_ms,
+                                      args.force, not args.allow_remote, args.compress)))
         if pdf_file:
             print(f"✓ Conversion complete: {pdf_file}")
         else:
             print("✗ Conversion failed")
             sys.exit(1)
-    
+
     elif input_path.is_dir():
-        # Convert all HTML files in directory
-        generated_pdfs = batch_convert_directory(str(input_path), args.output)
+        # Convert all HTML files in directory (one event loop for the whole run)
+        generated_pdfs = asyncio.run(_run_and_shutdown(
+            batch_convert_directory_async(str(input_path), args.output, args.jobs,
+                                          args.render_delay_ms, args.force, not args.allow_remote,
+                                          args.recursive, args.compress, args.dedupe)))
         
         print(f"\n=== Conversion Complete ===")
         print(f"Generated {len(generated_pdfs)} PDF files")
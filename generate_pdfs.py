@@ -6,6 +6,7 @@ Easy-to-use script for generating PDFs from Teams call flow HTML files
 
 import os
 import sys
+import asyncio
 import argparse
 from pathlib import Path
 
@@ -13,12 +14,31 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent / "Modules"))
 
 try:
-    from pdf_generator import convert_html_to_pdf, batch_convert_directory, check_playwright
+    from pdf_generator import (
+        convert_html_to_pdf_async,
+        batch_convert_directory_async,
+        check_playwright,
+        shutdown,
+    )
 except ImportError:
     print("✗ Could not import PDF generator module")
     print("Ensure the Modules/pdf_generator.py file exists")
     sys.exit(1)
 
+async def _generate(input_path, output_dir, jobs, render_delay_ms, force=False, block_remote=True,
+                    recursive=False, compress=True, dedupe=False):
+    """Run the whole conversion on one event loop with one shared browser"""
+    try:
+        if input_path.is_file():
+            return await convert_html_to_pdf_async(str(input_path), str(output_dir), render_delay_ms,
+                                                   force, block_remote, compress)
+        else:
+            return await batch_convert_directory_async(str(input_path), str(output_dir), jobs,
+                                                       render_delay_ms, force, block_remote,
+                                                       recursive, compress, dedupe)
+    finally:
+        await shutdown()
+
 def main():
     parser = argparse.ArgumentParser(
         description="Generate PDFs from Teams Call Flow HTML files",
@@ -50,6 +70,51 @@ Examples:
         help="Output directory for PDF files (default: same location as HTML with PDF suffix)"
     )
     
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=None,
+        help="Maximum concurrent conversions (default: min(8, CPU count))"
+    )
+
+    parser.add_argument(
+        "--render-delay-ms",
+        type=int,
+        default=0,
+        help="Extra wait after page load for delayed dynamic content (default: 0)"
+    )
+
+    parser.add_argument(
+        "-f", "--force",
+        action="store_true",
+        help="Regenerate PDFs even if they are newer than their HTML source"
+    )
+
+    parser.add_argument(
+        "-r", "--recursive",
+        action="store_true",
+        help="Also convert HTML files in subdirectories"
+    )
+
+    parser.add_argument(
+        "--no-compress",
+        dest="compress",
+        action="store_false",
+        help="Skip the post-render PDF stream recompression"
+    )
+
+    parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        help="Render identical HTML files once and link the duplicate PDFs"
+    )
+
+    parser.add_argument(
+        "--allow-remote",
+        action="store_true",
+        help="Allow pages to fetch http(s) resources instead of blocking them"
+    )
+
     parser.add_argument(
         "--check",
         action="store_true",
@@ -104,7 +169,8 @@ Examples:
     try:
         if input_path.is_file() and input_path.suffix.lower() == '.html':
             # Single file
-            pdf_file = convert_html_to_pdf(str(input_path), str(output_dir))
+            pdf_file = asyncio.run(_generate(input_path, output_dir, args.jobs, args.render_delay_ms,
+                                             args.force, not args.allow_remote, compress=args.compress))
             if pdf_file:
                 print(f"✓ Generated: {Path(pdf_file).name}")
                 print(f"✓ PDF generation successful")
@@ -114,7 +180,9 @@ Examples:
         
         elif input_path.is_dir():
             # Directory
-            generated_pdfs = batch_convert_directory(str(input_path), str(output_dir))
+            generated_pdfs = asyncio.run(_generate(input_path, output_dir, args.jobs, args.render_delay_ms,
+                                             args.force, not args.allow_remote, args.recursive,
+                                             args.compress, args.dedupe))
             
             if generated_pdfs:
                 print(f"\n=== Generation Complete ===")